@@ -1,39 +1,38 @@
 import streamlit as st
-from dotenv import load_dotenv
-import os
+from page_assets import load_portrait
 
-# Load configuration from .env file
-load_dotenv()
+# --- Styles ---
+_PORTAL_CSS = """
+<style>
+.stApp {
+    background-color: #0d281a; /* Dark green background */
+    color: #f7f3e8; /* Off-white text */
+    text-align: center;
+}
+.main-title {
+    font-size: 3.5em;
+    color: #d11218; /* Festive red */
+    font-family: 'Arial Black', sans-serif;
+    margin-top: 1em;
+}
+.subtitle {
+    font-size: 1.5em;
+    color: #56793A;
+    margin-bottom: 2em;
+}
+</style>
+"""
 
-st.set_page_config(page_title="🎄 Home", layout="wide")
-
-st.markdown(
-    """
-    <style>
-    .stApp {
-        background-color: #0d281a; /* Dark green background */
-        color: #f7f3e8; /* Off-white text */
-        text-align: center;
-    }
-    .main-title {
-        font-size: 3.5em;
-        color: #d11218; /* Festive red */
-        font-family: 'Arial Black', sans-serif;
-        margin-top: 1em;
-    }
-    .subtitle {
-        font-size: 1.5em;
-        color: #56793A;
-        margin-bottom: 2em;
-    }
-    </style>
-    """,
-    unsafe_allow_html=True
+_PORTAL_HEADER = (
+    '<h1 class="main-title">Calendario de Adviento 2025</h1>'
+    '<p class="subtitle">Escanea tu código QR para saber qué tienes de regalo!</p>'
 )
 
-st.markdown('<h1 class="main-title">Calendario de Adviento 2025</h1>', unsafe_allow_html=True)
-st.markdown('<p class="subtitle">Escanea tu código QR para saber qué tienes de regalo!</p>', unsafe_allow_html=True)
+st.set_page_config(page_title="🎄 Home", layout="wide")
+
+# Styles, title and subtitle are emitted in a single markdown call
+st.markdown(_PORTAL_CSS + _PORTAL_HEADER, unsafe_allow_html=True)
 
-st.image("assets/family-portrait.png", width='stretch')
+st.image(load_portrait(), width='stretch')
 
 st.sidebar.caption("Adventskalendar App")
\ No newline at end of file
@@ -0,0 +1,57 @@
+"""Shared app configuration, loaded once from the .env file.
+
+Streamlit re-executes page scripts on every rerun, but imported modules stay
+cached in sys.modules, so the .env file is only parsed once per process.
+"""
+import calendar
+import hashlib
+import os
+from datetime import date
+from dotenv import load_dotenv
+
+# Load configuration from .env file
+load_dotenv()
+
+# --- Data & Assets ---
+DATA_FILE = "advent_messages.json"
+# Downscaled WebP copy of assets/family-portrait.png (2400x1792 PNG, ~7MB)
+PORTRAIT_FILE = "assets/family-portrait_1200.webp"
+
+# --- Calendar Dates ---
+# FIX: Convert env variables to integers, providing defaults if not set or invalid
+try:
+    CALENDAR_YEAR = int(os.getenv("CALENDAR_YEAR", date.today().year))
+except (ValueError, TypeError):
+    CALENDAR_YEAR = date.today().year
+
+try:
+    CALENDAR_MONTH = int(os.getenv("CALENDAR_MONTH", 12))
+except (ValueError, TypeError):
+    CALENDAR_MONTH = 12
+
+try:
+    MAX_DAY = int(os.getenv("MAX_DAY", 24))
+except (ValueError, TypeError):
+    MAX_DAY = 24
+
+# The configured month name never changes within a run
+MONTH_NAME = calendar.month_name[CALENDAR_MONTH]
+
+# --- Debugging ---
+# Capture the raw string value from the environment first
+RAW_DEBUG_MODE = os.getenv("DEBUG_MODE", 'False')
+# Then convert to boolean (Robust conversion: handles 'true', 'True', '1', etc.)
+DEBUG_MODE = RAW_DEBUG_MODE.lower() in ('true', '1', 't')
+
+# --- Kids ---
+KID_1_NAME = os.getenv("KID_1_NAME", "Kid 1")
+KID_2_NAME = os.getenv("KID_2_NAME", "Kid 2")
+# Lookup tables indexed by kid ID (1 or 2); index 0 is unused
+KID_NAMES = (None, KID_1_NAME, KID_2_NAME)
+KID_COLS = (None, 'Message_Kid1', 'Message_Kid2')
+
+# --- Admin & QR Codes ---
+ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "7623")
+# Hash the password once so each login attempt is a constant-time digest comparison
+ADMIN_PASSWORD_HASH = hashlib.sha256(ADMIN_PASSWORD.encode()).digest() if ADMIN_PASSWORD else None
+HOSTING_URL_BASE = os.getenv("HOSTING_URL_BASE", "http://adventskalender2025.streamlit.app")
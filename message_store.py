@@ -0,0 +1,105 @@
+"""Door date parsing and gating, plus reading and writing advent_messages.json."""
+import json
+import os
+import re
+from datetime import date
+from functools import lru_cache
+
+import streamlit as st
+try:
+    import orjson # Fast JSON parser/serializer; the standard library is used as a fallback
+except ImportError:
+    orjson = None
+
+from config import CALENDAR_MONTH, CALENDAR_YEAR, DATA_FILE, MONTH_NAME
+
+# Strict YYYY-MM-DD pattern used instead of the slower datetime.strptime
+DATE_RE = re.compile(r'(\d{4})-(\d{2})-(\d{2})', re.ASCII)
+# Row key holding the door date
+_DATE_KEY = 'Date'
+
+
+def parse_date(date_str):
+    """Parse a YYYY-MM-DD string into a date. Raises ValueError if invalid."""
+    match = DATE_RE.fullmatch(date_str)
+    if not match:
+        raise ValueError(f"'{date_str}' does not match format YYYY-MM-DD")
+    return date(*map(int, match.groups()))
+
+
+@lru_cache(maxsize=64)
+def check_door_date(requested_date_str, today_ordinal):
+    """Time-gate check for a door date, returning (is_accessible, reason).
+
+    Keyed on the day (as an ordinal) so results expire at midnight. A plain
+    lru_cache: this module survives reruns, and st.cache_data's hashing and
+    pickling would cost more than the check itself."""
+    today = date.fromordinal(today_ordinal)
+
+    try:
+        requested_date = parse_date(requested_date_str)
+    except ValueError:
+        return False, f"Invalid date format in the URL or JSON data: {requested_date_str}. Must be YYYY-MM-DD."
+
+    # 1. Check if the requested door date belongs to the configured calendar year/month
+    # This prevents accessing future years/months even if the day is in the past
+    if requested_date.year != CALENDAR_YEAR or requested_date.month != CALENDAR_MONTH:
+        # If the door date is outside the configured calendar (e.g., trying to access 2026 door on a 2025 calendar)
+        return False, f"This door date ({requested_date_str}) is outside the configured {MONTH_NAME} {CALENDAR_YEAR} calendar."
+
+    # 2. Check the date gate: the requested date must not be in the future
+    if today >= requested_date:
+        return True, None
+    else:
+        # Use the configured month name instead of hardcoded 'December'
+        return False, f"It's only {MONTH_NAME} {today.day}. This door ({requested_date_str}) is still sealed!"
+
+
+@st.cache_data(show_spinner=False, max_entries=1)
+def read_messages(mtime):
+    """Read and parse the JSON file into (data, index), where index maps each
+    Date string to its row. Cached per file modification time (mtime), so the
+    file is only re-read after it changes on disk; only the latest version is kept."""
+    # Read raw bytes; both orjson and json decode UTF-8 (JSON/emojis) directly
+    with open(DATA_FILE, 'rb') as f:
+        raw = f.read()
+    data = orjson.loads(raw) if orjson else json.loads(raw)
+    # FIX: Defensive cleaning: Strip whitespace from Date field on load
+    for d in data:
+        # One dict probe per row; exact type check skips isinstance's subclass walk
+        v = d.get(_DATE_KEY)
+        if type(v) is str:
+            d[_DATE_KEY] = v.strip()
+    index = {d[_DATE_KEY]: d for d in data if _DATE_KEY in d}
+    return data, index
+
+
+def write_messages(data):
+    """Serialize the list of message dictionaries and atomically replace the JSON file."""
+    # Use indent for readability in the JSON file (orjson always writes UTF-8).
+    # OPT_NON_STR_KEYS coerces non-string keys like json.dumps does instead of raising.
+    if orjson:
+        options = orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS
+        payload = orjson.dumps(data, option=options)
+    else:
+        payload = (json.dumps(data, ensure_ascii=False, indent=2) + "\n").encode('utf-8')
+
+    # Write atomically: fill a temp file, fsync it, then swap it in.
+    # Readers see either the old or the new file, never a half-written one.
+    tmp_file = DATA_FILE + '.tmp'
+    try:
+        # f.write on a buffered file writes everything, unlike a single os.write
+        with open(tmp_file, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, DATA_FILE)
+    except BaseException:
+        # Don't leave a partial temp file behind
+        try:
+            os.remove(tmp_file)
+        except OSError:
+            pass
+        raise
+    # Drop the cached copy so the next load picks up the saved data
+    read_messages.clear()
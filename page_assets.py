@@ -0,0 +1,11 @@
+"""Page assets shared by the portal and door pages, read once per process."""
+import streamlit as st
+
+from config import PORTRAIT_FILE
+
+
+@st.cache_resource(show_spinner=False)
+def load_portrait():
+    """Read the family portrait once per process instead of on every rerun."""
+    with open(PORTRAIT_FILE, 'rb') as f:
+        return f.read()
@@ -1,32 +1,50 @@
 import streamlit as st
-import json
 import os
-from dotenv import load_dotenv
-from datetime import date, datetime
-import qrcode # For generating QR codes
+import hashlib # For hashing entered passwords and QR cache keys
+import hmac # For constant-time password comparison
+from operator import itemgetter # C-level sort key for the Date field
+import segno # For generating QR codes (fast matrix build + built-in 1-bit PNG writer)
 import io # For handling in-memory files (QR codes, zip)
-import base64 # For generating download links
 import zipfile # For creating bulk download zips
-import urllib.parse # For safely encoding the URL query parameters
 
-# Load configuration from .env file
-load_dotenv()
-
-# --- Configuration ---
-DATA_FILE = "advent_messages.json"
-# Using defaults based on user's config.toml for consistency, though code relies on .env
-ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "7623")
-KID_1_NAME = os.getenv("KID_1_NAME", "Isabel")
-KID_2_NAME = os.getenv("KID_2_NAME", "Sebastian")
-# Streamlit typically handles environment variables as strings, so we load them as such
-CALENDAR_YEAR = os.getenv("CALENDAR_YEAR", str(date.today().year))
-CALENDAR_MONTH = os.getenv("CALENDAR_MONTH", "12")
-HOSTING_URL_BASE = os.getenv("HOSTING_URL_BASE", "http://adventskalender2025.streamlit.app")
-
-# Capture the raw string value from the environment first
-RAW_DEBUG_MODE = os.getenv("DEBUG_MODE", 'False')
-# Then convert to boolean
-DEBUG_MODE = RAW_DEBUG_MODE.lower() in ('true', '1', 't')
+from config import (
+    ADMIN_PASSWORD, ADMIN_PASSWORD_HASH, CALENDAR_YEAR, CALENDAR_MONTH, DATA_FILE,
+    DEBUG_MODE, HOSTING_URL_BASE, KID_1_NAME, KID_2_NAME, RAW_DEBUG_MODE,
+)
+from message_store import DATE_RE, parse_date, read_messages, write_messages
+
+# --- QR Codes ---
+# Base URL for the Door Message page (clean, pointing to the correct page path)
+DOOR_URL_BASE = HOSTING_URL_BASE.rstrip('/') + '/Door_Message'
+# Constant part of every QR payload, pre-encoded so only the date and kid vary per code
+_QR_URL_PREFIX = (DOOR_URL_BASE + '?date=').encode()
+# QR render settings: error correction level, pixels per module, quiet-zone modules
+_QR_ERROR = 'l'
+_QR_SCALE = 10
+_QR_BORDER = 4
+# On-disk cache of generated QR PNGs, named by the SHA-1 of the render settings
+# plus the target URL. Changing HOSTING_URL_BASE or any render setting changes
+# every name, so stale entries are never read.
+QR_CACHE_DIR = ".qrcache"
+_QR_CACHE_TAG = f"segno|{_QR_ERROR}|{_QR_SCALE}|{_QR_BORDER}|".encode()
+
+# --- Styles ---
+_ADMIN_CSS = """
+<style>
+.stApp { background-color: #0d281a; color: #f7f3e8; }
+.stButton>button {
+    background-color: #d11218; 
+    color: white;
+    border-radius: 8px;
+    padding: 10px 20px;
+    font-weight: bold;
+    transition: all 0.2s;
+}
+.stButton>button:hover {
+    background-color: #8B0000;
+}
+</style>
+"""
 
 
 # --- Data Handling Functions ---
@@ -35,13 +53,8 @@ def load_data():
     """Load messages from the JSON file."""
     if os.path.exists(DATA_FILE):
         try:
-            with open(DATA_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                # FIX: Defensive cleaning: Strip whitespace from Date field on load
-                for d in data:
-                    if 'Date' in d and isinstance(d['Date'], str):
-                        d['Date'] = d['Date'].strip()
-                return data
+            data, _ = read_messages(os.path.getmtime(DATA_FILE))
+            return data
         except Exception as e:
             st.error(f"Error loading JSON data: {e}")
             return []
@@ -58,7 +71,7 @@ def validate_data(data):
             return False
         try:
             # Check for correct date format
-            datetime.strptime(date_str, '%Y-%m-%d')
+            parse_date(date_str)
         except ValueError:
             st.error(f"Validation failed on row {i+1}: 'Date' value '{date_str}' is not in YYYY-MM-DD format.")
             return False
@@ -75,12 +88,11 @@ def save_data(data):
         
     # 2. Proceed with saving if valid
     try:
-        # Sort data by Date string for clean display
-        data.sort(key=lambda x: x.get('Date', '0000-00-00'))
+        # Sort data by Date string for clean display (YYYY-MM-DD sorts lexicographically).
+        # validate_data() guarantees every row has a Date string, so no default is needed.
+        data.sort(key=itemgetter('Date'))
         
-        with open(DATA_FILE, 'w', encoding='utf-8') as f:
-            # Use indent for readability in the JSON file
-            json.dump(data, f, ensure_ascii=False, indent=4)
+        write_messages(data)
         st.success("Message data saved successfully!")
     except Exception as e:
         st.error(f"Error saving JSON data: {e}")
@@ -88,38 +100,71 @@ def save_data(data):
 
 # --- QR Code Functions ---
 
-def get_base_url():
-    """Constructs the base URL for the Door Message page."""
-    # Ensure the URL is clean and points to the correct page path
-    base = HOSTING_URL_BASE.rstrip('/')
-    return f"{base}/Door_Message"
+@st.cache_data(show_spinner=False)
+def get_qr_version():
+    """Returns the smallest QR version that fits a door URL.
 
+    Every door URL has the same length (YYYY-MM-DD date, one-digit kid ID), so
+    fitting a single sample URL once lets each code skip the version search.
+    The sample uses the same UTF-8 bytes as the real payload: segno would encode
+    a str as ISO-8859-1 where it can, which may fit a too-small version."""
+    sample_url = _QR_URL_PREFIX + b'0000-00-00&kid=0'
+    return segno.make(sample_url, error=_QR_ERROR, micro=False).version
+
+@st.cache_data(show_spinner=False, max_entries=128)
 def generate_qr_code(date_str, kid_id):
-    """Generates a QR code for a specific date and kid ID, returning image bytes."""
-    base_url = get_base_url()
-    
-    # Use urllib.parse.urlencode for safe query string construction
-    params = urllib.parse.urlencode({'date': date_str, 'kid': kid_id})
-    full_url = f"{base_url}?{params}"
-    
-    # Create QR code object
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(full_url)
-    qr.make(fit=True)
+    """Generates a QR code for a specific date and kid ID, returning image bytes.
 
-    img = qr.make_image(fill_color="black", back_color="white")
-    
-    # Save image to an in-memory buffer
+    Cached, so the bulk ZIP and the single-door view share each PNG across reruns."""
+    # Dates (YYYY-MM-DD) and kid IDs are URL-safe, so no urlencode is needed.
+    # Built as bytes: segno encodes them in byte mode as-is, and sha1 takes them directly.
+    full_url = _QR_URL_PREFIX + date_str.encode() + b'&kid=' + str(kid_id).encode()
+
+    # Reuse a PNG generated by an earlier process (survives app restarts)
+    cache_path = os.path.join(QR_CACHE_DIR, hashlib.sha1(_QR_CACHE_TAG + full_url).hexdigest() + ".png")
+    if os.path.exists(cache_path):
+        with open(cache_path, 'rb') as f:
+            return f.read()
+
+    # segno builds the matrix and writes a 1-bit PNG itself (no PIL involved)
+    qr = segno.make(full_url, error=_QR_ERROR, version=get_qr_version(), micro=False)
     buffer = io.BytesIO()
-    img.save(buffer, format="PNG")
-    buffer.seek(0)
-    
-    return buffer.getvalue()
+    qr.save(buffer, kind='png', scale=_QR_SCALE, border=_QR_BORDER)
+    png_bytes = buffer.getvalue()
+
+    try:
+        os.makedirs(QR_CACHE_DIR, exist_ok=True)
+        tmp_path = cache_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(png_bytes)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass # The disk cache is best-effort (e.g. read-only filesystem)
+
+    return png_bytes
+
+@st.cache_data(show_spinner=False)
+def generate_bulk_zip(dates):
+    """Generates a zip file containing all QR codes.
+
+    Takes a tuple of date strings (tuple[str, ...]): cheap to hash as a cache
+    key, and message edits (which don't change the QR URLs) don't invalidate
+    the cached zip."""
+    zip_buffer = io.BytesIO()
+    # PNGs are already DEFLATE-compressed, so store them as-is instead of compressing twice
+    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_STORED) as zf:
+        for date_str in dates:
+            day = date_str.split('-')[2]
+
+            # Kid 1 QR
+            qr_kid1_bytes = generate_qr_code(date_str, 1)
+            zf.writestr(f"Door_{day}_{KID_1_NAME}_QR.png", qr_kid1_bytes)
+
+            # Kid 2 QR
+            qr_kid2_bytes = generate_qr_code(date_str, 2)
+            zf.writestr(f"Door_{day}_{KID_2_NAME}_QR.png", qr_kid2_bytes)
+
+    return zip_buffer.getvalue()
 
 
 # --- Authentication ---
@@ -132,7 +177,9 @@ def check_password():
 
     def password_entered():
         """Checks whether a password entered is correct."""
-        if st.session_state["password"] == ADMIN_PASSWORD:
+        entered = st.session_state["password"]
+        entered_hash = hashlib.sha256(entered.encode()).digest()
+        if ADMIN_PASSWORD_HASH is not None and hmac.compare_digest(entered_hash, ADMIN_PASSWORD_HASH):
             st.session_state["password_correct"] = True
             del st.session_state["password"]  # Don't store password.
         else:
@@ -161,25 +208,7 @@ def check_password():
 def admin_panel(initial_data):
     """The main Streamlit admin page content."""
     st.set_page_config(page_title="🎄 Admin Panel", layout="wide")
-    st.markdown(
-        """
-        <style>
-        .stApp { background-color: #0d281a; color: #f7f3e8; }
-        .stButton>button {
-            background-color: #d11218; 
-            color: white;
-            border-radius: 8px;
-            padding: 10px 20px;
-            font-weight: bold;
-            transition: all 0.2s;
-        }
-        .stButton>button:hover {
-            background-color: #8B0000;
-        }
-        </style>
-        """,
-        unsafe_allow_html=True
-    )
+    st.markdown(_ADMIN_CSS, unsafe_allow_html=True)
     st.title("🎄 Advent Calendar Admin Panel")
     st.subheader(f"Editing Messages for {CALENDAR_MONTH}/{CALENDAR_YEAR}")
     
@@ -233,10 +262,13 @@ def admin_panel(initial_data):
     # --- 2. QR Code Generation Section ---
     st.markdown("### 2. QR Code Generation & Download")
     
-    # Get active doors only
-    active_doors = sorted([
-        d for d in edited_data if d.get('Is_Active', False)
-    ], key=lambda x: x.get('Date', '0000-00-00'))
+    # Get active doors only, skipping unsaved rows whose Date isn't YYYY-MM-DD
+    # (this also keeps the QR URLs free of characters that would need encoding)
+    # Every kept row has a Date string, so it can be sorted with a C-level itemgetter
+    active_doors = sorted((
+        d for d in edited_data
+        if d.get('Is_Active') and isinstance(d.get('Date'), str) and DATE_RE.fullmatch(d['Date'])
+    ), key=itemgetter('Date'))
     
     if not active_doors:
         st.info("No active doors found in the data to generate QR codes.")
@@ -246,35 +278,21 @@ def admin_panel(initial_data):
     
     # --- Bulk Download Section ---
     st.markdown("#### Bulk Download (All Active Doors)")
-    
-    @st.cache_data
-    def generate_bulk_zip(doors):
-        """Generates a zip file containing all QR codes."""
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
-            for door in doors:
-                date_str = door['Date']
-                day = date_str.split('-')[2]
-                
-                # Kid 1 QR
-                qr_kid1_bytes = generate_qr_code(date_str, 1)
-                zf.writestr(f"Door_{day}_{KID_1_NAME}_QR.png", qr_kid1_bytes)
-                
-                # Kid 2 QR
-                qr_kid2_bytes = generate_qr_code(date_str, 2)
-                zf.writestr(f"Door_{day}_{KID_2_NAME}_QR.png", qr_kid2_bytes)
-                
-        return zip_buffer.getvalue()
-
-    zip_data = generate_bulk_zip(active_doors)
-    
-    st.download_button(
-        label=f"📦 Download ZIP ({len(active_doors) * 2} QR Codes)",
-        data=zip_data,
-        file_name="advent_calendar_qrcodes.zip",
-        mime="application/zip",
-        help="Downloads a single ZIP file containing all QR codes for all active dates and both kids."
-    )
+
+    # Only build the zip once requested; the flag persists so later reruns keep the download button
+    if st.button("Prepare ZIP of All QR Codes"):
+        st.session_state["build_zip"] = True
+
+    if st.session_state.get("build_zip"):
+        zip_data = generate_bulk_zip(tuple(door_dates))
+
+        st.download_button(
+            label=f"📦 Download ZIP ({len(active_doors) * 2} QR Codes)",
+            data=zip_data,
+            file_name="advent_calendar_qrcodes.zip",
+            mime="application/zip",
+            help="Downloads a single ZIP file containing all QR codes for all active dates and both kids."
+        )
     
     st.markdown("#### Single Door View")
     